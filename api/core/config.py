@@ -1,12 +1,15 @@
-from pydantic_settings import BaseSettings
-import dotenv
+import os
+from dotenv import load_dotenv
 
-dotenv.load_dotenv()
+load_dotenv()
 
-class Settings(BaseSettings):
-    AUTH_KEY: str
+try:
+    AUTH_KEY = os.environ["AUTH_KEY"]
+except KeyError:
+    raise SystemExit("AUTH_KEY environment variable is not set")
 
-    class Config:
-        env_file = ".env"
-
-settings = Settings()
\ No newline at end of file
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 8))
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", 5.0))
+MODEL_DIR = os.environ.get("MODEL_DIR", '/workspace/model')
+MODEL_QUANTIZATION = os.environ.get("MODEL_QUANTIZATION", "")  # Set to "int8" to load 8-bit weights; needs bitsandbytes (GPU only) and accelerate
\ No newline at end of file
@@ -3,8 +3,12 @@ Class to determine if the authentication key of a user is valid.
 """
 
 from fastapi import HTTPException, status
-from api.core.config import settings
+from api.core import config
 import hashlib
+import hmac
+
+# Expected key digest, encoded once for constant-time comparison
+_EXPECTED_KEY = config.AUTH_KEY.encode()
 
 class AuthenticationService:
     def __init__(self, auth_key: str):
@@ -21,7 +25,7 @@ class AuthenticationService:
         Check if the authentication key is valid.
         """
         hashed_input = self._hash_key(self.auth_key)
-        return hashed_input == settings.AUTH_KEY
+        return hmac.compare_digest(hashed_input.encode(), _EXPECTED_KEY)
 
     def raise_exception_if_invalid(self):
         """
@@ -0,0 +1,96 @@
+"""
+Class to fuse concurrent single-prompt inference requests into batched forward passes.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api.services.inference_service import InferenceService
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _PendingRequest:
+    input_context: str
+    max_length: int
+    temperature: float
+    future: asyncio.Future
+
+class BatchingService:
+    def __init__(self, inference_service: "InferenceService", executor: Executor, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.inference_service = inference_service
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.queue = asyncio.Queue()
+
+    async def submit(self, input_context: str, max_length: int = 512, temperature: float = 0.3) -> str:
+        """
+        Queue a single input context and wait for its generated text.
+        Raises ValueError if the prompt leaves no room for new tokens within max_length.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingRequest(input_context, max_length, temperature, future))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """
+        Wait for one request, then gather more until the batch is full or the wait window closes.
+        """
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while len(items) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def run(self):
+        """
+        Background loop that drains the queue and runs one forward pass per temperature bucket.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect_batch()
+
+            # Requests can only share a forward pass if they sample at the same temperature; each keeps its own max_length
+            buckets = {}
+            for item in items:
+                buckets.setdefault(item.temperature, []).append(item)
+
+            for temperature, bucket in buckets.items():
+                try:
+                    generated_texts = await loop.run_in_executor(
+                        self.executor,
+                        functools.partial(
+                            self.inference_service.generate_texts,
+                            [item.input_context for item in bucket],
+                            max_lengths=[item.max_length for item in bucket],
+                            temperature=temperature
+                        )
+                    )
+                except Exception as e:
+                    logger.error("Error during batched inference: %s", e)
+                    for item in bucket:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                else:
+                    # Over-long prompts come back as a ValueError in their own slot
+                    for item, generated_text in zip(bucket, generated_texts):
+                        if item.future.done():
+                            continue
+                        if isinstance(generated_text, Exception):
+                            item.future.set_exception(generated_text)
+                        else:
+                            item.future.set_result(generated_text)
@@ -1,7 +1,6 @@
 import torch
-from torch.cuda.amp import autocast
 from api.services.authentication_service import AuthenticationService
-from api.services.model_loader import model, tokenizer, device
+from api.services.model_loader import model, tokenizer, device, dtype
 import logging
 import os
 
@@ -12,6 +11,8 @@ os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'max_split_size_mb:128'
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+PROMPT_PATH = '/workspace/lo-backend/prompt.txt'
+
 class InferenceService:
     def __init__(self, authentication_key: str):
         self.model = model
@@ -19,17 +20,28 @@ class InferenceService:
         self.authentication_key = authentication_key
         self.authentication_service = AuthenticationService(authentication_key)
 
+    def _build_prompts(self, input_contexts: list) -> list:
+        """
+        Fill the prompt template with each input context, terminating contexts with punctuation.
+        """
+        with open(PROMPT_PATH, 'r') as file:
+            template = file.read()
+
+        prompts = []
+        for input_context in input_contexts:
+            if input_context:
+                input_context = f"{input_context}." if input_context[-1] not in ['?', '!', '.'] else input_context
+            else:
+                input_context = ""
+            prompts.append(template.replace('<<CONTEXT>>', f"context: {input_context}"))
+        return prompts
+
     def generate_text(self, input_context: str, max_length: int = 512, temperature: float = 0.3, top_p: float = 0.85, top_k: float = 0.9) -> str:
         """
         Generate text from the custom model with a batch size of 1 and all possible memory optimizations.
         """
         try:
-            with open('/workspace/lo-backend/prompt.txt', 'r') as file:
-               if input_context:
-                  input_context = f"{input_context}." if input_context[-1] not in ['?', '!', '.'] else input_context
-               else:
-                  input_context = ""
-               prompt = file.read().replace('<<CONTEXT>>', f"context: {input_context}")
+            prompt = self._build_prompts([input_context])[0]
 
             # Tokenize the input context with truncation and padding to ensure batch size of 1
             input_ids = self.tokenizer.encode(prompt, return_tensors="pt", truncation=True, padding=True).to(device)
@@ -39,7 +51,7 @@ class InferenceService:
 
             # Perform inference using mixed precision and no gradients
             with torch.no_grad():
-                with autocast():
+                with torch.autocast(device_type=device.type, dtype=dtype):
                     output = self.model.generate(
                         input_ids,
                         max_length=max_length,
@@ -55,7 +67,7 @@ class InferenceService:
             generated_text = self.tokenizer.decode(output[0], skip_special_tokens=True)
 
             generated_text = generated_text.split('<bot>:')[-1].strip()
-            logger.info(f"Generated text: {generated_text}")
+            logger.info("Generated text: %s", generated_text)
             return generated_text
 
         except torch.cuda.OutOfMemoryError as oom:
@@ -67,23 +79,87 @@ class InferenceService:
             logger.error(f"Error during text generation: {e}", exc_info=True)
             raise RuntimeError(f"Text generation failed: {str(e)}")
 
+    def generate_texts(self, input_contexts: list, max_lengths: list = None, temperature: float = 0.3, top_p: float = 0.85, top_k: float = 0.9) -> list:
+        """
+        Generate text for several input contexts in one fused forward pass, using the same prompt as generate_text.
+        Each input keeps its own max_length budget (512 by default), independent of how much padding the batch needs.
+        An input whose prompt leaves no room within its max_length gets a ValueError in its slot instead of a text.
+        """
+        try:
+            prompts = self._build_prompts(input_contexts)
+            if max_lengths is None:
+                max_lengths = [512] * len(prompts)
+
+            # Tokenize all prompts together, left-padded to the longest one
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
+
+            # Work out each input's own new-token budget from its unpadded prompt length
+            prompt_lengths = inputs["attention_mask"].sum(dim=1).tolist()
+            budgets = [max_length - prompt_length for max_length, prompt_length in zip(max_lengths, prompt_lengths)]
+            generated_texts = [
+                ValueError(f"Input context is too long: prompt is {prompt_length} tokens but max_length is {max_length}")
+                if budget <= 0 else None
+                for max_length, prompt_length, budget in zip(max_lengths, prompt_lengths, budgets)
+            ]
+
+            rows = [i for i, budget in enumerate(budgets) if budget > 0]
+            if rows:
+                # Drop the over-long rows along with the padding columns only they needed
+                padded_length = max(prompt_lengths[i] for i in rows)
+                inputs = {key: value[rows, -padded_length:].to(device) for key, value in inputs.items()}
+
+                # Perform inference on the whole batch using mixed precision and no gradients
+                with torch.no_grad():
+                    with torch.autocast(device_type=device.type, dtype=dtype):
+                        outputs = self.model.generate(
+                            **inputs,
+                            max_new_tokens=max(budgets[i] for i in rows),
+                            temperature=temperature,
+                            top_p=top_p,
+                            top_k=top_k
+                        )
+
+                # Clear GPU memory after inference to avoid memory fragmentation
+                torch.cuda.empty_cache()
+
+                # Trim each row to its own budget, then decode keeping only the bot's reply
+                for i, output in zip(rows, outputs):
+                    output = output[:padded_length + budgets[i]]
+                    generated_texts[i] = self.tokenizer.decode(output, skip_special_tokens=True).split('<bot>:')[-1].strip()
+
+            logger.info("Generated %d texts in one batch", len(rows))
+            return generated_texts
+
+        except torch.cuda.OutOfMemoryError as oom:
+            logger.error("CUDA Out of Memory during fused inference", exc_info=True)
+            torch.cuda.empty_cache()
+            raise RuntimeError("Out of GPU memory during inference. Try with a smaller input.") from oom
+
+        except Exception as e:
+            logger.error(f"Error during fused text generation: {e}", exc_info=True)
+            raise RuntimeError(f"Text generation failed: {str(e)}")
+
     def generate_text_with_batch_size(self, input_contexts: list, batch_size: int = 1, max_length: int = 128, temperature: float = 0.7) -> list:
         """
         Generate text with a specified batch size. Handles multiple inputs and splits into batches.
+        Identical inputs are only run through the model once and their result is shared.
         """
         try:
+            # Deduplicate the inputs while preserving order
+            unique_contexts = list(dict.fromkeys(input_contexts))
+
             # Split input contexts into batches based on the batch size
-            batched_inputs = [input_contexts[i:i + batch_size] for i in range(0, len(input_contexts), batch_size)]
+            batched_inputs = [unique_contexts[i:i + batch_size] for i in range(0, len(unique_contexts), batch_size)]
 
             generated_texts = []
             for batch in batched_inputs:
                 # Tokenize the batch of inputs efficiently with padding and truncation
-                input_ids = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True).to(device)
+                inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True).to(device)
 
                 # Perform inference on each batch with mixed precision
                 with torch.no_grad():
-                    with autocast():
-                        outputs = self.model.generate(input_ids, max_length=max_length, temperature=temperature)
+                    with torch.autocast(device_type=device.type, dtype=dtype):
+                        outputs = self.model.generate(**inputs, max_length=max_length, temperature=temperature)
 
                 # Decode outputs for each batch element
                 batch_texts = [self.tokenizer.decode(output, skip_special_tokens=True) for output in outputs]
@@ -92,7 +168,9 @@ class InferenceService:
                 # Clear GPU memory after each batch to avoid memory fragmentation
                 torch.cuda.empty_cache()
 
-            return generated_texts
+            # Scatter the results back to every position of the original inputs
+            texts_by_context = dict(zip(unique_contexts, generated_texts))
+            return [texts_by_context[input_context] for input_context in input_contexts]
 
         except torch.cuda.OutOfMemoryError as oom:
             logger.error("CUDA Out of Memory Error during batch inference", exc_info=True)
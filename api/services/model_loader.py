@@ -1,7 +1,7 @@
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
 import logging
-import os
+from api.core import config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -10,21 +10,35 @@ logger = logging.getLogger(__name__)
 # Device configuration
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Weight precision: BF16 on CPUs and recent GPUs, FP16 on GPUs without BF16 support
+dtype = torch.bfloat16 if device.type == "cpu" or torch.cuda.is_bf16_supported() else torch.float16
+
 def load_model():
     try:
-        model_dir = os.getenv('MODEL_DIR', '/workspace/model')
+        model_dir = config.MODEL_DIR
         logger.info(f"Loading custom model from {model_dir} on device: {device}")
 
         # Clear GPU memory before loading the model
         torch.cuda.empty_cache()
 
-        # Load model using FP16 (half precision) for memory savings
-        model = AutoModelForCausalLM.from_pretrained(
-            model_dir, trust_remote_code=True
-        ).half().to(device)
+        if config.MODEL_QUANTIZATION == "int8":
+            # Load 8-bit weights through bitsandbytes, letting accelerate place them on the GPU
+            model = AutoModelForCausalLM.from_pretrained(
+                model_dir, trust_remote_code=True,
+                quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                device_map="auto"
+            )
+        else:
+            # Load weights straight into half precision instead of converting after an FP32 load
+            model = AutoModelForCausalLM.from_pretrained(
+                model_dir, trust_remote_code=True, torch_dtype=dtype, low_cpu_mem_usage=True
+            ).to(device)
 
         tokenizer = AutoTokenizer.from_pretrained(model_dir)
 
+        # Pad on the left so batched prompts all end right where generation starts
+        tokenizer.padding_side = "left"
+
         # Enable gradient checkpointing for additional memory efficiency
         model.gradient_checkpointing_enable()
 
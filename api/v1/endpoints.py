@@ -1,81 +1,89 @@
+import asyncio
+import functools
 import logging
 from api.services.inference_service import InferenceService
 from api.services.authentication_service import AuthenticationService
-from fastapi import APIRouter, HTTPException, Query, Body
+from api.v1.schemas import BatchInferenceRequest, BatchInferenceResponse, InferenceRequest, InferenceResponse, LoginResponse
+from dependencies import get_authentication_service, get_inference_service, require_auth
+from fastapi import APIRouter, Depends, HTTPException, Request
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/inference")
+@router.post("/inference", response_model=InferenceResponse)
 async def inference(
-    input_context: str,  # Expecting a single string input
-    auth_key: str,
-    max_length: int = Query(512),  # Allow custom max_length via the request
-    temperature: float = Query(0.3)  # Allow custom temperature via the request
+    request: Request,
+    inference_request: InferenceRequest,
+    auth_key: str = Depends(require_auth)
 ):
     """
-    Endpoint for single inference (batch size 1), where user submits a single string as input.
+    Endpoint for single inference, where user submits a single string as input.
+    Concurrent requests are fused into one forward pass by the batching service.
     """
     try:
-        # Initialize the inference service
-        inference_service = InferenceService(auth_key)
-        # Validate the auth_key
-        AuthenticationService(auth_key).raise_exception_if_invalid()
-
-        # Call the generate_text method for a single input context (batch size 1)
-        generated_text = inference_service.generate_text(input_context, max_length=max_length, temperature=temperature)
+        # Queue the input context and wait for the batch it lands in to finish
+        generated_text = await request.app.state.batching_service.submit(
+            inference_request.input_context,
+            max_length=inference_request.max_length,
+            temperature=inference_request.temperature
+        )
         return {"generated_text": generated_text}
 
+    except ValueError as e:
+        # Rejected request, e.g. a prompt that leaves no room within max_length
+        raise HTTPException(status_code=400, detail=str(e))
+
     except Exception as e:
-        logger.error(f"Error during inference: {e}")
+        logger.error("Error during inference: %s", e)
         raise HTTPException(status_code=500, detail=f"Text generation failed: {str(e)}")
 
 
-@router.post("/batch_inference")
+@router.post("/batch_inference", response_model=BatchInferenceResponse)
 async def batch_inference(
-    input_context: str,  # A single input string
-    auth_key: str,
-    num_batches: int = Query(1),  # Number of times to duplicate the input to simulate batch size
-    max_length: int = Query(128),
-    temperature: float = Query(0.7)
+    request: Request,
+    batch_request: BatchInferenceRequest,
+    auth_key: str = Depends(require_auth),
+    inference_service: InferenceService = Depends(get_inference_service)
 ):
     """
     Endpoint for batch inference, where the user submits a single string that will be duplicated.
     """
     try:
-        # Initialize the inference service
-        inference_service = InferenceService(auth_key)
-        # Validate the auth_key
-        AuthenticationService(auth_key).raise_exception_if_invalid()
-
         # Duplicate the single input context for batch processing
-        input_contexts = [input_context] * num_batches
+        input_contexts = [batch_request.input_context] * batch_request.num_batches
 
-        # Call the batch generate_text_with_batch_size method
-        generated_texts = inference_service.generate_text_with_batch_size(
-            input_contexts, batch_size=num_batches, max_length=max_length, temperature=temperature
+        # Call the batch generate_text_with_batch_size method on the worker pool
+        generated_texts = await asyncio.get_running_loop().run_in_executor(
+            request.app.state.exec_pool,
+            functools.partial(
+                inference_service.generate_text_with_batch_size,
+                input_contexts,
+                batch_size=batch_request.num_batches,
+                max_length=batch_request.max_length,
+                temperature=batch_request.temperature
+            )
         )
         return {"generated_texts": generated_texts}
 
     except Exception as e:
-        logger.error(f"Error during batch inference: {e}")
+        logger.error("Error during batch inference: %s", e)
         raise HTTPException(status_code=500, detail=f"Batch text generation failed: {str(e)}")
 
 
-@router.get("/login")
+@router.get("/login", response_model=LoginResponse)
 async def login(
     auth_key: str,
+    authentication_service: AuthenticationService = Depends(get_authentication_service)
 ):
     """
     Endpoint for login validation.
     """
     try:
-        authentication_service = AuthenticationService(auth_key)
-        print({'authenticated' : authentication_service.is_valid()})
-        return {'authenticated' : authentication_service.is_valid()}
+        authenticated = authentication_service.is_valid()
+        logger.info("auth=%s", authenticated)
+        return {'authenticated' : authenticated}
 
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
\ No newline at end of file
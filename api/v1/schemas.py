@@ -0,0 +1,25 @@
+"""
+Request and response models for the v1 API endpoints.
+"""
+
+from pydantic import BaseModel, Field
+
+class InferenceRequest(BaseModel):
+    input_context: str  # Expecting a single string input
+    max_length: int = Field(512, gt=0)
+    temperature: float = Field(0.3, ge=0)
+
+class BatchInferenceRequest(BaseModel):
+    input_context: str  # A single input string
+    num_batches: int = Field(1, ge=1)  # Number of times to duplicate the input to simulate batch size
+    max_length: int = Field(128, gt=0)
+    temperature: float = Field(0.7, ge=0)
+
+class InferenceResponse(BaseModel):
+    generated_text: str
+
+class BatchInferenceResponse(BaseModel):
+    generated_texts: list[str]
+
+class LoginResponse(BaseModel):
+    authenticated: bool
@@ -1,9 +1,19 @@
+from functools import lru_cache
 from api.services.authentication_service import AuthenticationService
 from api.services.inference_service import InferenceService
-from fastapi import Depends
 
-def get_authentication_service(auth_key: str = Depends(AuthenticationService)):
+# Services are cached per auth key so the hot path is a dict lookup instead of a construction
+@lru_cache(maxsize=32)
+def get_authentication_service(auth_key: str) -> AuthenticationService:
     return AuthenticationService(auth_key)
 
-def get_inference_service(auth_key: str = Depends(get_authentication_service)):
-    return InferenceService(auth_key)
\ No newline at end of file
+@lru_cache(maxsize=32)
+def get_inference_service(auth_key: str) -> InferenceService:
+    return InferenceService(auth_key)
+
+def require_auth(auth_key: str) -> str:
+    """
+    Reject the request with a 401 before any handler work if the auth key is invalid.
+    """
+    get_authentication_service(auth_key).raise_exception_if_invalid()
+    return auth_key
\ No newline at end of file
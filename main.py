@@ -1,8 +1,18 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+# Configure logging once, before the api modules are imported and the model starts loading
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
 from api.v1 import endpoints
+from api.services.batching_service import BatchingService
 from api.services.inference_service import InferenceService
-from api.core.config import settings
+from api.core import config
 
 app = FastAPI(title="LeaderOracle API")
 
@@ -15,14 +25,40 @@ app.add_middleware(
     allow_headers=["*"],                      # Allow all headers
 )
 
+# Compress larger responses such as /batch_inference output
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include API endpoints
 app.include_router(endpoints.router, prefix="/api/v1")
 
 @app.on_event("startup")
 async def startup_event():
-    # You can add any startup tasks here, such as loading the model
-    pass
+    # Worker pool for blocking model calls so they don't stall the event loop
+    app.state.exec_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+    # Dynamic batcher that fuses concurrent /inference calls into one forward pass
+    app.state.batching_service = BatchingService(
+        InferenceService(config.AUTH_KEY),
+        app.state.exec_pool,
+        max_batch_size=config.MAX_BATCH_SIZE,
+        max_wait_ms=config.MAX_WAIT_MS
+    )
+    app.state.batch_worker = asyncio.create_task(app.state.batching_service.run())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.batch_worker.cancel()
+    app.state.exec_pool.shutdown(wait=False)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Each worker process loads its own copy of the model, so scale WEB_CONCURRENCY with available GPU memory
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        backlog=int(os.environ.get("UVICORN_BACKLOG", 2048))  # Deeper accept queue to avoid SYN drops under bursts
+    )
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from api.services.batching_service import BatchingService
+
+class StubInferenceService:
+    """
+    Stands in for InferenceService: one token per character, replies are the upper-cased context and its new-token budget.
+    """
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def generate_texts(self, input_contexts, max_lengths, temperature):
+        self.calls.append((list(input_contexts), list(max_lengths), temperature))
+        if self.fail_on in input_contexts:
+            raise RuntimeError("Text generation failed")
+        return [
+            ValueError("Input context is too long") if max_length <= len(input_context)
+            else f"{input_context.upper()}:{max_length - len(input_context)}"
+            for input_context, max_length in zip(input_contexts, max_lengths)
+        ]
+
+class BatchingServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def run_with_worker(self, inference_service, requests, max_batch_size=8):
+        """
+        Start the batching worker, submit every (input_context, max_length, temperature) concurrently and collect the outcomes.
+        """
+        async def scenario():
+            batching_service = BatchingService(inference_service, self.executor, max_batch_size=max_batch_size, max_wait_ms=50)
+            worker = asyncio.create_task(batching_service.run())
+            try:
+                return await asyncio.gather(
+                    *(batching_service.submit(c, max_length=m, temperature=t) for c, m, t in requests),
+                    return_exceptions=True
+                )
+            finally:
+                worker.cancel()
+        return asyncio.run(scenario())
+
+    def test_fuses_requests_with_the_same_temperature(self):
+        inference_service = StubInferenceService()
+        results = self.run_with_worker(inference_service, [("abc", 10, 0.3), ("xyz", 10, 0.3), ("def", 10, 0.3)])
+
+        self.assertEqual(results, ["ABC:7", "XYZ:7", "DEF:7"])
+        self.assertEqual(len(inference_service.calls), 1)
+        contexts, max_lengths, temperature = inference_service.calls[0]
+        self.assertCountEqual(contexts, ["abc", "xyz", "def"])
+        self.assertEqual((max_lengths, temperature), ([10, 10, 10], 0.3))
+
+    def test_budget_is_per_request_not_per_batch(self):
+        inference_service = StubInferenceService()
+        results = self.run_with_worker(inference_service, [("ab", 10, 0.3), ("abcdef", 10, 0.3), ("cd", 10, 0.7)])
+
+        # "ab" and "abcdef" share one call yet keep their own new-token budgets
+        self.assertEqual(results, ["AB:8", "ABCDEF:4", "CD:8"])
+        self.assertEqual(len(inference_service.calls), 2)
+        fused = next(call for call in inference_service.calls if call[2] == 0.3)
+        self.assertCountEqual(fused[0], ["ab", "abcdef"])
+        self.assertEqual(fused[1], [10, 10])
+
+    def test_respects_max_batch_size(self):
+        inference_service = StubInferenceService()
+        results = self.run_with_worker(inference_service, [(c, 10, 0.3) for c in "abcde"], max_batch_size=2)
+
+        self.assertEqual(results, [f"{c}:9" for c in "ABCDE"])
+        self.assertTrue(all(len(contexts) <= 2 for contexts, _, _ in inference_service.calls))
+
+    def test_rejects_over_long_prompt_without_affecting_others(self):
+        inference_service = StubInferenceService()
+        results = self.run_with_worker(inference_service, [("abc", 10, 0.3), ("a" * 10, 10, 0.3)])
+
+        self.assertEqual(results[0], "ABC:7")
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(len(inference_service.calls), 1)
+
+    def test_generation_error_only_fails_its_bucket(self):
+        inference_service = StubInferenceService(fail_on="bad")
+        results = self.run_with_worker(inference_service, [("bad", 10, 0.3), ("abc", 10, 0.3), ("ok", 10, 0.7)])
+
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2], "OK:8")
+
+if __name__ == "__main__":
+    unittest.main()
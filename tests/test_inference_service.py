@@ -0,0 +1,72 @@
+import importlib.util
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+os.environ.setdefault("AUTH_KEY", "test-key")
+
+class StubTokenizer:
+    """
+    Stands in for the Hugging Face tokenizer: "encodes" a batch as the list of its texts.
+    """
+    def __call__(self, texts, **kwargs):
+        return StubEncoding(texts)
+
+    def decode(self, output, skip_special_tokens=True):
+        return output.upper()
+
+class StubEncoding(dict):
+    def __init__(self, texts):
+        super().__init__(input_ids=list(texts))
+
+    def to(self, device):
+        return self
+
+class StubModel:
+    """
+    Stands in for the model: records every batch it is asked to generate for and echoes it back.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def generate(self, input_ids, **kwargs):
+        self.batches.append(list(input_ids))
+        return input_ids
+
+@unittest.skipUnless(all(importlib.util.find_spec(name) for name in ("torch", "fastapi", "dotenv")), "inference dependencies are not installed")
+class GenerateTextWithBatchSizeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import torch
+
+        # Swap in a model loader that doesn't load real weights
+        model_loader = types.ModuleType("api.services.model_loader")
+        model_loader.model = None
+        model_loader.tokenizer = None
+        model_loader.device = torch.device("cpu")
+        model_loader.dtype = torch.bfloat16
+        with mock.patch.dict(sys.modules, {"api.services.model_loader": model_loader}):
+            from api.services.inference_service import InferenceService
+        cls.InferenceService = InferenceService
+
+    def setUp(self):
+        self.inference_service = self.InferenceService("test-key")
+        self.inference_service.model = StubModel()
+        self.inference_service.tokenizer = StubTokenizer()
+
+    def test_generates_once_per_distinct_input(self):
+        results = self.inference_service.generate_text_with_batch_size(["a", "b", "a"], batch_size=8)
+
+        self.assertEqual(results, ["A", "B", "A"])
+        self.assertEqual(self.inference_service.model.batches, [["a", "b"]])
+
+    def test_scatters_results_back_in_input_order_across_batches(self):
+        results = self.inference_service.generate_text_with_batch_size(["b", "a", "b", "c", "a"], batch_size=2)
+
+        self.assertEqual(results, ["B", "A", "B", "C", "A"])
+        self.assertEqual(self.inference_service.model.batches, [["b", "a"], ["c"]])
+
+if __name__ == "__main__":
+    unittest.main()